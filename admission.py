@@ -0,0 +1,84 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when the generation queue is already full"""
+
+
+class _Waiter:
+    __slots__ = ("granted", "wakeup")
+
+    def __init__(self):
+        self.granted = False
+        self.wakeup = None
+
+
+class AdmissionController:
+    """Bound the number of in-flight BRD generations and queue the rest in FIFO order"""
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 32):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._in_flight = 0
+        self._queue = deque()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    @asynccontextmanager
+    async def slot(self, on_position=None):
+        """Hold one generation slot; on_position(n) is awaited whenever the queue position changes"""
+        await self._acquire(on_position)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, on_position):
+        if self._in_flight < self.max_in_flight and not self._queue:
+            self._in_flight += 1
+            return
+        if len(self._queue) >= self.max_queue:
+            raise AdmissionRejected(f"queue is full ({self.max_queue} waiting)")
+
+        waiter = _Waiter()
+        self._queue.append(waiter)
+        reported = None
+        try:
+            while not waiter.granted:
+                waiter.wakeup = asyncio.get_running_loop().create_future()
+                position = self._queue.index(waiter) + 1
+                if on_position and position != reported:
+                    reported = position
+                    await on_position(position)
+                if not waiter.granted:
+                    await waiter.wakeup
+        except BaseException:
+            if waiter.granted:
+                self._release()
+            else:
+                self._queue.remove(waiter)
+                self._wake(self._queue)
+            raise
+
+    def _release(self):
+        if self._queue:
+            # hand the slot straight to the head of the queue
+            waiter = self._queue.popleft()
+            waiter.granted = True
+            self._wake([waiter, *self._queue])
+        else:
+            self._in_flight -= 1
+
+    @staticmethod
+    def _wake(waiters):
+        for waiter in waiters:
+            if waiter.wakeup is not None and not waiter.wakeup.done():
+                waiter.wakeup.set_result(None)
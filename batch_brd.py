@@ -0,0 +1,176 @@
+"""Generate BRDs in bulk from a JSONL job file, without the Chainlit UI.
+
+    python batch_brd.py jobs.jsonl --manifest manifest.jsonl --output-dir files/batch
+
+Each job line is {"id": ..., "project_name": ..., "description": ..., "template": ...};
+"id" is optional and defaults to a hash of the other fields. Model calls run
+concurrently under a requests-per-minute budget, and the DOCX rendering is
+done in a process pool. Every finished job appends a record to the manifest.
+Re-running with the same manifest skips jobs whose output already exists and
+was rendered from the current contents of their template.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from brd_generate_agent import graph, write_brd_docx
+from rate_limit import RateLimiter
+from template_registry import template_key
+
+
+def job_id(job: dict) -> str:
+    if job.get("id"):
+        return str(job["id"])
+    key = json.dumps([job.get("project_name"), job.get("description"), job.get("template")])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _template_key(path: str, known: dict):
+    """Content hash of a job's template, or None if it cannot be read"""
+    if not path:
+        return None
+    if path not in known:
+        try:
+            with open(path, "rb") as f:
+                known[path] = template_key(f.read())
+        except OSError:
+            known[path] = None
+    return known[path]
+
+
+def read_jobs(path: str) -> list:
+    jobs = []
+    templates = {}
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as e:
+                raise SystemExit(f"{path}:{line_no}: invalid JSON ({e})")
+            job["id"] = job_id(job)
+            job["template_key"] = _template_key(job.get("template"), templates)
+            jobs.append(job)
+    return jobs
+
+
+def completed_jobs(manifest_path: str) -> dict:
+    """Map ids whose latest manifest record succeeded and whose output still exists to their template hash"""
+    latest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a torn line from an interrupted run
+                latest[record["id"]] = record
+    return {
+        id_: record.get("template_key") for id_, record in latest.items()
+        if record.get("status") == "ok" and os.path.exists(record.get("output_path") or "")
+    }
+
+
+class BatchRunner:
+    def __init__(self, args):
+        self.args = args
+        self.rate_limiter = RateLimiter(args.rpm)
+        self.slots = asyncio.Semaphore(args.concurrency)
+        self.pool = ProcessPoolExecutor(
+            max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.counts = {}
+
+    def record(self, record: dict):
+        record["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        with open(self.args.manifest, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        self.counts[record["status"]] = self.counts.get(record["status"], 0) + 1
+        print(f"[{record['status']}] {record['id']} {record.get('output_path') or record.get('error', '')}")
+
+    async def run_job(self, job: dict):
+        record = {"id": job["id"], "project_name": job.get("project_name"),
+                  "template_key": job.get("template_key"), "timings": {}}
+        missing = [k for k in ("project_name", "description", "template") if not job.get(k)]
+        if missing:
+            self.record({**record, "status": "error", "error": f"missing {', '.join(missing)}"})
+            return
+
+        async with self.slots:
+            start = time.perf_counter()
+            try:
+                result = await graph.ainvoke(
+                    {
+                        "project_name": job["project_name"],
+                        "user_input": job["description"],
+                        "brd_template_file": job["template"],
+                        "stream": False,
+                        "render": False,
+                    },
+                    config={"configurable": {"rate_limiter": self.rate_limiter}},
+                )
+            except Exception as e:
+                self.record({**record, "status": "error", "error": f"generation failed: {e!r}"})
+                return
+            record["timings"]["generate"] = round(time.perf_counter() - start, 3)
+
+        if not result.get("is_valid"):
+            self.record({**record, "status": "invalid", "error": "description is too short"})
+            return
+
+        safe_proj_name = re.sub(r'[\\/*?:"<>|]', "_", job["project_name"])
+        output_path = os.path.join(self.args.output_dir, f"BRD_{safe_proj_name}_{job['id']}.docx")
+        render_start = time.perf_counter()
+        try:
+            record["output_path"] = await asyncio.get_running_loop().run_in_executor(
+                self.pool, write_brd_docx, result["brd_html"], output_path, job["template"]
+            )
+        except Exception as e:
+            self.record({**record, "status": "error", "error": f"render failed: {e!r}"})
+            return
+        record["timings"]["render"] = round(time.perf_counter() - render_start, 3)
+        record["timings"]["total"] = round(time.perf_counter() - start, 3)
+        self.record({**record, "status": "ok"})
+
+    async def run(self, jobs: list):
+        try:
+            await asyncio.gather(*(self.run_job(job) for job in jobs))
+        finally:
+            self.pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate BRDs in bulk from a JSONL job file")
+    parser.add_argument("jobs", help="JSONL file with project_name, description and template per line")
+    parser.add_argument("--manifest", default="batch_manifest.jsonl", help="results manifest (JSONL, appended)")
+    parser.add_argument("--output-dir", default=os.path.join("files", "batch"))
+    parser.add_argument("--concurrency", type=int, default=8, help="jobs generating at once")
+    parser.add_argument("--rpm", type=float, default=60, help="model requests per minute")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="DOCX render processes")
+    args = parser.parse_args()
+
+    jobs = read_jobs(args.jobs)
+    done = completed_jobs(args.manifest)
+    # a job is redone when its template has changed since it last completed
+    pending = list({
+        job["id"]: job for job in jobs
+        if job["id"] not in done or done[job["id"]] != job["template_key"]
+    }.values())
+    print(f"{len(jobs)} jobs, {len(jobs) - len(pending)} already completed, {len(pending)} to run")
+
+    runner = BatchRunner(args)
+    start = time.perf_counter()
+    asyncio.run(runner.run(pending))
+    print(f"Finished in {time.perf_counter() - start:.1f}s: {runner.counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Benchmark every stage of the compiled BRD graph against a deterministic fake LLM.
+
+    python bench_graph.py --iterations 5 --mode parallel single stream --json bench.json
+
+A corpus of generated templates (5, 10 and 15 headings) is crossed with a few
+project descriptions. Every combination runs through graph.ainvoke, and the
+spans from tracing.py are aggregated per mode and node. The generation cache
+is bypassed unless --use-cache is given, so each run includes the model call.
+Save results with --json and compare them between commits to catch regressions.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+
+from docx import Document
+
+from fake_llm import start_fake_llm
+
+SECTION_NAMES = ["Introduction", "Business Objectives", "Scope", "Stakeholders", "Current State",
+                 "Functional Requirements", "Non-Functional Requirements", "Data Requirements",
+                 "Integrations", "Reporting", "Security", "Assumptions", "Constraints", "Risks",
+                 "Acceptance Criteria"]
+DESCRIPTIONS = [
+    "Online ordering portal for a bakery chain with payments, loyalty points and delivery tracking",
+    "Internal HR leave management system with approval workflows, calendar sync and audit reports",
+    "Mobile field service app for technicians with offline job sheets, photo capture and invoicing",
+]
+MODES = {
+    "parallel": {"parallel_sections": True, "stream": False},
+    "single": {"parallel_sections": False, "stream": False},
+    "stream": {"parallel_sections": False, "stream": True},
+}
+
+
+def make_templates(directory: str) -> list:
+    paths = []
+    for count in (5, 10, 15):
+        doc = Document()
+        for heading in SECTION_NAMES[:count]:
+            doc.add_heading(heading, level=1)
+            doc.add_paragraph("Describe this section.")
+        path = os.path.join(directory, f"template_{count}.docx")
+        doc.save(path)
+        paths.append(path)
+    return paths
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(spans: list) -> dict:
+    by_node = {}
+    for span in spans:
+        by_node.setdefault(span["node"], []).append(span)
+    summary = {}
+    for node, node_spans in sorted(by_node.items()):
+        times = [s["wall_seconds"] for s in node_spans]
+        summary[node] = {
+            "runs": len(node_spans),
+            "p50_ms": percentile(times, 50) * 1000,
+            "p95_ms": percentile(times, 95) * 1000,
+            "mean_ms": statistics.mean(times) * 1000,
+        }
+        for key in ("prompt_tokens", "response_tokens", "html_bytes", "docx_bytes", "first_content_seconds"):
+            values = [s[key] for s in node_spans if key in s]
+            if values:
+                summary[node][f"mean_{key}"] = statistics.mean(values)
+        hits = [s for s in node_spans if s.get("generation_cache") == "hit" or s.get("template_cache") == "hit"]
+        if hits:
+            summary[node]["cache_hits"] = len(hits)
+    return summary
+
+
+async def run(args, templates: list) -> dict:
+    import tracing
+    from brd_generate_agent import graph
+
+    results = {}
+    for mode in args.mode:
+        spans = []
+        tracing.add_sink(spans.append)
+        try:
+            for _ in range(args.iterations):
+                for template in templates:
+                    for i, description in enumerate(DESCRIPTIONS):
+                        await graph.ainvoke({
+                            "project_name": f"Bench {i}",
+                            "user_input": description,
+                            "brd_template_file": template,
+                            "refresh_cache": not args.use_cache,
+                            **MODES[mode],
+                        })
+        finally:
+            tracing.remove_sink(spans.append)
+        results[mode] = summarize(spans)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BRD graph stage by stage")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--mode", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM latency per call, seconds")
+    parser.add_argument("--rows", type=int, default=20, help="table rows per fake section")
+    parser.add_argument("--use-cache", action="store_true", help="let the generation cache serve repeats")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+    if args.json:
+        args.json = os.path.abspath(args.json)
+
+    workdir = tempfile.mkdtemp(prefix="brd_bench_")
+    templates = make_templates(workdir)
+    os.chdir(workdir)
+    server = start_fake_llm(latency=args.latency, rows=args.rows)
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("GOOGLE_API_KEY", "fake-key")
+    os.environ["BRD_GEN_CACHE_PATH"] = os.path.join(workdir, "generations.sqlite")
+
+    results = asyncio.run(run(args, templates))
+    server.shutdown()
+
+    print(f"{'mode':<9} {'node':<24} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9}")
+    for mode, nodes in results.items():
+        for node, stats in nodes.items():
+            print(f"{mode:<9} {node:<24} {stats['runs']:>5} {stats['p50_ms']:>9.1f} "
+                  f"{stats['p95_ms']:>9.1f} {stats['mean_ms']:>9.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
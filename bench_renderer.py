@@ -0,0 +1,103 @@
+"""Compare docx_renderer with htmldocx on synthetic BRDs.
+
+    python bench_renderer.py --rows 50 200 1000 --repeat 3
+
+Each document has a few headed sections with paragraphs, lists and one
+requirements table of the given row count. Every run happens in a fresh
+process. Time is the best of --repeat runs and includes saving the .docx to
+memory. Peak memory is the growth in the process's peak RSS, so it includes
+lxml's C allocations (Unix only).
+htmldocx slows down quadratically with table rows, so it is skipped above
+--max-htmldocx-rows (200 by default).
+"""
+import argparse
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from docx import Document
+from htmldocx import HtmlToDocx
+
+from docx_renderer import render_html
+
+
+def synthetic_brd(rows: int) -> str:
+    parts = []
+    for i, heading in enumerate(["Introduction", "Scope", "Functional Requirements", "Acceptance Criteria"], 1):
+        parts.append(f"<h1>{i}. {heading}</h1>")
+        parts.append(f"<h2>{i}.1 Overview</h2>")
+        parts.append("<p>This section describes the <b>business need</b> and the <i>expected outcome</i>.</p>")
+        parts.append("<ul><li>Stakeholders are identified</li><li>Constraints are documented</li></ul>")
+    parts.append("<h2>3.2 Requirement List</h2>")
+    parts.append("<table><tr><th>ID</th><th>Requirement</th><th>Priority</th><th>Owner</th></tr>")
+    for r in range(1, rows + 1):
+        parts.append(f"<tr><td>FR-{r:04d}</td><td>The system shall support capability number {r}.</td>"
+                     f"<td>{'High' if r % 3 else 'Medium'}</td><td>Team {r % 7}</td></tr>")
+    parts.append("</table>")
+    return "\n".join(parts)
+
+
+def with_htmldocx(html: str):
+    doc = Document()
+    HtmlToDocx().add_html_to_document(html, doc)
+    for table in doc.tables:
+        table.style = "Table Grid"
+    return doc
+
+
+def with_renderer(html: str):
+    return render_html(html, Document())
+
+
+CONVERTERS = {"htmldocx": with_htmldocx, "renderer": with_renderer}
+
+
+def _max_rss() -> int:
+    if resource is None:
+        return 0
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_once(name: str, rows: int):
+    """Convert one synthetic BRD; runs in a child process"""
+    html = synthetic_brd(rows)
+    baseline = _max_rss()
+    start = time.perf_counter()
+    CONVERTERS[name](html).save(io.BytesIO())
+    seconds = time.perf_counter() - start
+    return seconds, _max_rss() - baseline
+
+
+def measure(name: str, rows: int, repeat: int):
+    results = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results.append(pool.submit(run_once, name, rows).result())
+    return min(r[0] for r in results), max(r[1] for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML to DOCX conversion")
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-htmldocx-rows", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'converter':<10} {'time (ms)':>10} {'peak rss (MiB)':>15}")
+    for rows in args.rows:
+        for name in CONVERTERS:
+            if name == "htmldocx" and rows > args.max_htmldocx_rows:
+                print(f"{rows:>6} {name:<10} {'skipped':>10}")
+                continue
+            seconds, rss = measure(name, rows, args.repeat)
+            print(f"{rows:>6} {name:<10} {seconds * 1000:>10.1f} {rss / 2 ** 20:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
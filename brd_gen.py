@@ -1,6 +1,21 @@
 import chainlit as cl
-from brd_generate_agent import graph 
-import asyncio
+from brd_generate_agent import graph, output_store
+from admission import AdmissionController, AdmissionRejected
+from section_stream import SectionOrderer, html_to_markdown
+from incremental import is_regenerate_command, parse_regenerate_command
+from tracing import start_metrics_server
+import os
+
+admission = AdmissionController(
+    max_in_flight=int(os.getenv("BRD_MAX_IN_FLIGHT", "8")),
+    max_queue=int(os.getenv("BRD_MAX_QUEUE", "32")),
+)
+
+if os.getenv("BRD_METRICS_PORT"):
+    start_metrics_server(int(os.getenv("BRD_METRICS_PORT")))
+
+if output_store is not None:
+    output_store.start_gc(interval=float(os.getenv("BRD_OUTPUT_GC_INTERVAL", "600")))
 
 @cl.on_chat_start
 async def start():
@@ -19,42 +34,106 @@ async def main(message: cl.Message):
                 template_file_path = element.path
                 break
 
+    # a follow-up message in the same chat reuses the sections that did not change
+    previous = cl.user_session.get("brd_previous")
+    requested = parse_regenerate_command(user_description, previous["headings"]) if previous else []
+    if not requested and is_regenerate_command(user_description):
+        if not previous:
+            await cl.Message(
+                content="There is no BRD to regenerate yet. Upload a BRD template (.docx) and describe your project."
+            ).send()
+            return
+        await cl.Message(
+            content="Which sections should be regenerated? The BRD has these sections: "
+                    + ", ".join(previous["headings"]) + "."
+        ).send()
+        return
+    if requested:
+        user_description = previous["description"]
+    if previous:
+        template_file_path = template_file_path or previous["template"]
+
     if not user_description.strip() or not template_file_path:
         await cl.Message(
             content="Please upload a BRD template (.docx) AND provide a project description."
         ).send()
         return
 
-    
-    generating_msg = await cl.Message(
-        content="Generating your BRD Word document... please wait..."
-    ).send()
+    generating_text = "Generating your BRD Word document... please wait..."
+    generating_msg = await cl.Message(content=generating_text).send()
+    queued = False
 
-    result = await asyncio.to_thread(
-        graph.invoke,
-        {
-            "project_name": "User Project",
-            "user_input": user_description,
-            "brd_template_file": template_file_path,
-            "headings": [],
-            "brd_html": "",
-            "output_path": "",
-            "file_name": "",
-            "final_docx": "",
-            "is_valid": False
-        }
-    )
+    async def show_position(position):
+        nonlocal queued
+        queued = True
+        generating_msg.content = f"Your BRD is #{position} in the queue... please wait..."
+        await generating_msg.update()
 
-    docx_path = result.get("final_docx")
+    try:
+        async with admission.slot(on_position=show_position):
+            if queued:
+                generating_msg.content = generating_text
+                await generating_msg.update()
+            preview_msg = cl.Message(content="")
+            result = {}
+            # parallel sections finish in any order; show them in template order
+            orderer = None
+            async for mode, chunk in graph.astream({
+                "project_name": "User Project",
+                "user_input": user_description,
+                "brd_template_file": template_file_path,
+                "headings": [],
+                "brd_html": "",
+                "output_path": "",
+                "file_name": "",
+                "final_docx": "",
+                "is_valid": False,
+                "previous": previous or {},
+                "requested_sections": requested,
+                "refresh_cache": bool(requested),
+            }, stream_mode=["custom", "values"]):
+                if mode == "custom" and "section" in chunk:
+                    sections = [chunk["section"]]
+                    if "heading" in chunk:
+                        orderer = orderer or SectionOrderer(result.get("headings") or [])
+                        sections = orderer.add(chunk["heading"], chunk["section"])
+                    for section in sections:
+                        await preview_msg.stream_token(html_to_markdown(section) + "\n\n")
+                elif mode == "values":
+                    result = chunk
+            for section in orderer.flush() if orderer else []:
+                await preview_msg.stream_token(html_to_markdown(section) + "\n\n")
+            if preview_msg.content:
+                await preview_msg.send()
+    except AdmissionRejected:
+        generating_msg.content = "The BRD generator is busy right now. Please try again in a few minutes."
+        await generating_msg.update()
+        return
+
+    docx_content = result.get("docx_content")
 
-    if not docx_path:
+    if not docx_content:
         await cl.Message(content="Failed to generate the BRD document.").send()
         return
 
     file = cl.File(
         name="BRD_Document.docx",
-        path=docx_path
+        content=docx_content,
+        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
     )
 
+    cl.user_session.set("brd_previous", {
+        "template": template_file_path,
+        "description": result["user_input"],
+        "headings": result["headings"],
+        "sections": result.get("section_html") or {},
+        "fingerprints": result.get("section_fingerprints") or {},
+    })
+
     await file.send(for_id=generating_msg.id)
-    await cl.Message(content="Your BRD Word document is ready!").send()
+    regenerated = result.get("regenerate_sections")
+    if previous and regenerated is not None and len(regenerated) < len(result["headings"]):
+        updated = ", ".join(regenerated) or "none, nothing changed"
+        await cl.Message(content=f"Your BRD Word document is ready! Updated sections: {updated}.").send()
+    else:
+        await cl.Message(content="Your BRD Word document is ready!").send()
@@ -1,15 +1,65 @@
 from langgraph.graph import StateGraph, START, END
-from typing import TypedDict
+from langgraph.types import Send, RetryPolicy
+from langgraph.config import get_config, get_stream_writer
+from typing import Annotated, TypedDict
 from google import genai
+from google.genai import errors as genai_errors, types
 from docx import Document
-from htmldocx import HtmlToDocx
+import asyncio
+import httpx
+import io
 import os
 import re
+import time
+import uuid
 from datetime import datetime
 from dotenv import load_dotenv
+from template_registry import TemplateRegistry
+from generation_cache import GenerationCache
+from section_stream import SectionSplitter, split_sections, strip_fences
+from docx_renderer import DocxRenderer, render_html
+from tracing import record, traced
+from output_store import OutputStore
+from incremental import plan_regeneration
+from rate_limit import is_rate_limited
 
 load_dotenv()
 
+MODEL = "gemini-3-flash-preview"
+# Bump whenever a prompt below changes so cached generations are not reused.
+PROMPT_VERSION = "1"
+PARALLEL_SECTIONS = os.getenv("BRD_PARALLEL_SECTIONS", "1") == "1"
+SECTION_CONCURRENCY = int(os.getenv("BRD_SECTION_CONCURRENCY", "4"))
+SECTION_TIMEOUT = float(os.getenv("BRD_SECTION_TIMEOUT", "120"))
+SECTION_ATTEMPTS = int(os.getenv("BRD_SECTION_ATTEMPTS", "3"))
+STREAM = os.getenv("BRD_STREAM", "0") == "1"
+
+template_registry = TemplateRegistry(
+    max_bytes=int(os.getenv("BRD_TEMPLATE_CACHE_MB", "64")) * 1024 * 1024,
+    cache_dir=os.getenv("BRD_TEMPLATE_CACHE_DIR") or None,
+)
+if os.getenv("BRD_TEMPLATE_PRELOAD"):
+    template_registry.preload(os.getenv("BRD_TEMPLATE_PRELOAD").split(os.pathsep))
+
+# set BRD_OUTPUT_STORE to an empty string to keep documents in memory only
+OUTPUT_STORE_DIR = os.getenv("BRD_OUTPUT_STORE", os.path.join("files", "store"))
+output_store = OutputStore(
+    OUTPUT_STORE_DIR,
+    max_bytes=int(os.getenv("BRD_OUTPUT_STORE_MB", "1024")) * 1024 * 1024,
+    max_age=float(os.getenv("BRD_OUTPUT_MAX_AGE", str(7 * 24 * 3600))),
+) if OUTPUT_STORE_DIR else None
+
+generation_cache = GenerationCache(
+    path=os.getenv("BRD_GEN_CACHE_PATH", os.path.join(".cache", "brd_generations.sqlite")),
+    ttl=float(os.getenv("BRD_GEN_CACHE_TTL", str(7 * 24 * 3600))),
+    max_bytes=int(os.getenv("BRD_GEN_CACHE_MB", "256")) * 1024 * 1024,
+)
+
+
+def merge_sections(left: dict, right: dict) -> dict:
+    """Reducer that collects section HTML produced by parallel tasks"""
+    return {**(left or {}), **(right or {})}
+
 
 class BRDState(TypedDict):
     project_name: str
@@ -19,39 +69,135 @@ class BRDState(TypedDict):
     output_path: str
     file_name: str
     final_docx: str
+    docx_content: bytes
+    output_id: str
     is_valid: bool
     brd_template_file: str
+    template_key: str
+    trace_id: str
+    parallel_sections: bool
+    refresh_cache: bool
+    stream: bool
+    render: bool
+    first_content_seconds: float
+    docx_document: object
+    previous: dict
+    requested_sections: list
+    regenerate_sections: list
+    section_fingerprints: dict
+    section_html: Annotated[dict, merge_sections]
+
+
+class SectionState(TypedDict):
+    heading: str
+    user_input: str
+    headings: list
+    refresh_cache: bool
+    trace_id: str
+
+
+_client = None
+
+
+def _get_client() -> genai.Client:
+    """Return the process-wide Gemini client so connections are reused"""
+    global _client
+    if _client is None:
+        GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+        if not GOOGLE_API_KEY:
+            raise Exception("GOOGLE_API_KEY not set")
+        base_url = os.getenv("GEMINI_BASE_URL")
+        http_options = types.HttpOptions(base_url=base_url) if base_url else None
+        _client = genai.Client(api_key=GOOGLE_API_KEY, http_options=http_options)
+    return _client
+
+
+def _request_config(timeout: float = None):
+    if not timeout:
+        return None
+    return types.GenerateContentConfig(
+        http_options=types.HttpOptions(timeout=int(timeout * 1000))
+    )
 
 
-def extract_headings_node(state: BRDState) -> BRDState:
+def section_fingerprint(user_input: str, headings: list, heading: str) -> str:
+    """Fingerprint of everything a section's generation depends on"""
+    return generation_cache.key(user_input, headings, MODEL, PROMPT_VERSION, heading)
+
+
+def _response_text(response) -> str:
+    return getattr(response, "text", None) or \
+           getattr(response, "output_text", None) or \
+           response.contents[0].text
+
+
+def _record_usage(usage):
+    if usage is not None:
+        record(prompt_tokens=usage.prompt_token_count or 0,
+               response_tokens=usage.candidates_token_count or 0)
+
+
+async def _generate_text(prompt: str, state: dict, section: str = "", timeout: float = None,
+                         on_chunk=None) -> str:
+    """Call the model, serving identical requests from the generation cache.
+
+    With on_chunk the response is streamed and on_chunk(text) is awaited per chunk.
+    """
+    key = generation_cache.key(state["user_input"], state["headings"], MODEL, PROMPT_VERSION, section)
+
+    async def call_model():
+        if on_chunk is None:
+            response = await _get_client().aio.models.generate_content(
+                model=MODEL, contents=prompt, config=_request_config(timeout)
+            )
+            _record_usage(response.usage_metadata)
+            return _response_text(response)
+        parts = []
+        usage = None
+        stream = await _get_client().aio.models.generate_content_stream(
+            model=MODEL, contents=prompt, config=_request_config(timeout)
+        )
+        async for chunk in stream:
+            usage = chunk.usage_metadata or usage
+            if chunk.text:
+                parts.append(chunk.text)
+                await on_chunk(chunk.text)
+        _record_usage(usage)
+        return "".join(parts)
+
+    # batch runs pass a RateLimiter through the run config to pace model calls
+    rate_limiter = get_config().get("configurable", {}).get("rate_limiter")
+    generate = call_model if rate_limiter is None else lambda: rate_limiter.run(call_model)
+
+    text, status = await generation_cache.lookup(key, generate, refresh=state.get("refresh_cache", False))
+    record(generation_cache=status)
+    if status == "hit":
+        print(f"Generation cache hit: {section or 'full document'}")
+    return text
+
+
+@traced
+async def extract_headings_node(state: BRDState) -> BRDState:
     """Extract Heading 1 from the template"""
-    doc = Document(state["brd_template_file"])
-    headings = []
-    for para in doc.paragraphs:
-        if para.style.name == "Heading 1":
-            clean = re.sub(r"\s*\(.*?\)\s*", "", para.text.strip())
-            if clean:
-                headings.append(clean)
+    template, cached = await asyncio.to_thread(template_registry.lookup, state["brd_template_file"])
+    record(template_cache="hit" if cached else "miss", headings=len(template.headings))
+    headings = list(template.headings)
     state["headings"] = headings
+    state["template_key"] = template.key
     print("Extracted Headings:", headings)
     return state
 
-def validate_input_node(state: BRDState) -> BRDState:
+@traced
+async def validate_input_node(state: BRDState) -> BRDState:
     """Check if user input is valid"""
     state["is_valid"] = len(state["user_input"].split()) >= 5
     if not state["is_valid"]:
         print("Invalid input detected")
     return state
 
-def generate_brd_html_node(state: BRDState) -> BRDState:
+@traced
+async def generate_brd_html_node(state: BRDState) -> BRDState:
     """Generate HTML BRD using Google Gemini API"""
-    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-    if not GOOGLE_API_KEY:
-        raise Exception("GOOGLE_API_KEY not set")
-
-    client = genai.Client(api_key=GOOGLE_API_KEY)
-    model = "gemini-3-flash-preview"
-
     prompt = f"""
 You are an expert Business Analyst. Generate a professional BRD for the following project:
 
@@ -63,42 +209,165 @@ Output HTML using <h1>, <h2>, <h3>, <p>, <ul>, <li>, <table>, <tr>, <th>, <td>.
 Do not use markdown.
 Tables must include headers.
 """
-    response = client.models.generate_content(model=model, contents=prompt)
-    state["brd_html"] = getattr(response, "text", None) or \
-                        getattr(response, "output_text", None) or \
-                        response.contents[0].text
+    if state.get("stream", STREAM):
+        state["brd_html"], state["docx_document"] = await _stream_brd_html(prompt, state)
+    else:
+        state["brd_html"] = await _generate_text(prompt, state)
+    # keep per-section HTML so a follow-up in the same chat can reuse sections
+    state["section_html"] = split_sections(state["brd_html"], state["headings"])
+    state["section_fingerprints"] = {
+        h: section_fingerprint(state["user_input"], state["headings"], h) for h in state["headings"]
+    }
+    record(html_bytes=len(state["brd_html"].encode("utf-8")))
     print("AI HTML Generated")
     return state
 
-def html_to_word_node(state: BRDState) -> BRDState:
+async def _stream_brd_html(prompt: str, state: BRDState):
+    """Stream the BRD, emitting each closed section and appending it to the document"""
+    writer = get_stream_writer()
+    splitter = SectionSplitter()
+    doc = await asyncio.to_thread(_new_document, state.get("template_key"), state.get("brd_template_file"))
+    renderer = DocxRenderer(doc)
+    start = time.perf_counter()
+
+    async def add_sections(sections):
+        for section in sections:
+            writer({"section": section})
+            await asyncio.to_thread(renderer.feed, section)
+
+    async def on_chunk(text):
+        if not splitter.seen:
+            state["first_content_seconds"] = time.perf_counter() - start
+            record(first_content_seconds=state["first_content_seconds"])
+            print(f"First content after {state['first_content_seconds']:.2f}s")
+        await add_sections(splitter.feed(text))
+
+    html = await _generate_text(prompt, state, on_chunk=on_chunk)
+    if not splitter.seen:
+        # served from the cache or by a coalesced call, so nothing was streamed
+        await on_chunk(html)
+    await add_sections(splitter.flush())
+    renderer.close()
+    return html, doc
+
+@traced
+async def generate_section_node(state: SectionState) -> dict:
+    """Generate the HTML for a single Heading 1 section"""
+    prompt = f"""
+You are an expert Business Analyst. You are writing one section of a professional BRD for the following project:
+
+Project Description: {state['user_input']}
+
+The full BRD has these main headings: {', '.join(state['headings'])}.
+Write ONLY the section "{state['heading']}", starting with <h1>{state['heading']}</h1>.
+Include numbered subheadings, bullet points, and tables where necessary.
+Output HTML using <h1>, <h2>, <h3>, <p>, <ul>, <li>, <table>, <tr>, <th>, <td>.
+Do not use markdown.
+Tables must include headers.
+"""
+    record(section=state["heading"])
+    html = strip_fences(await _generate_text(prompt, state, section=state["heading"], timeout=SECTION_TIMEOUT))
+    get_stream_writer()({"section": html, "heading": state["heading"]})
+    print(f"AI HTML Generated for section: {state['heading']}")
+    return {"section_html": {state["heading"]: html}}
+
+def retry_section(error: Exception) -> bool:
+    """Retry a section on timeouts, dropped connections, server errors and rate limiting"""
+    if isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError, genai_errors.ServerError)):
+        return True
+    return is_rate_limited(error)
+
+@traced
+async def merge_sections_node(state: BRDState) -> BRDState:
+    """Join section HTML back together in template order"""
+    sections = state.get("section_html") or {}
+    state["brd_html"] = "\n".join(sections[h] for h in state["headings"] if h in sections)
+    state["section_fingerprints"] = {
+        h: section_fingerprint(state["user_input"], state["headings"], h) for h in state["headings"]
+    }
+    record(html_bytes=len(state["brd_html"].encode("utf-8")))
+    return state
+
+def _new_document(template_key: str = None, template_file: str = None):
+    """Return an empty document on the request's template"""
+    if not template_key and not template_file:
+        return Document()
+    template = template_registry.get(template_key) if template_key else None
+    if template is None:
+        # evicted since extract_headings_node; parse the template again rather than lose its styles
+        if not template_file:
+            raise LookupError(f"Template {template_key} is no longer cached")
+        template = template_registry.load(template_file)
+    return template.new_document()
+
+def _save_docx(doc, output_path: str):
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    doc.save(output_path)
+
+def _docx_bytes(doc=None, brd_html: str = None, template_key: str = None, template_file: str = None) -> bytes:
+    if doc is None:
+        doc = _new_document(template_key, template_file)
+        render_html(brd_html, doc)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def write_brd_docx(brd_html: str, output_path: str, template_file: str = None):
+    """Render BRD HTML to a .docx on the template; safe to run in a worker process"""
+    doc = _new_document(template_file=template_file)
+    render_html(brd_html, doc)
+    _save_docx(doc, output_path)
+    return os.path.abspath(output_path)
+
+@traced
+async def html_to_word_node(state: BRDState) -> BRDState:
     """Convert HTML BRD to Word document"""
     if not state.get("brd_html"):
         print("ERROR: brd_html is empty!")
         return state
-
-    os.makedirs("files", exist_ok=True)
-
-    doc = Document()
-    parser = HtmlToDocx()
-    parser.add_html_to_document(state["brd_html"], doc)
-
-    for table in doc.tables:
-        table.style = "Table Grid"
+    if not state.get("render", True):
+        return state
 
     safe_proj_name = re.sub(r'[\\/*?:"<>|]', "_", state["project_name"])
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    file_name = f"BRD_{safe_proj_name}_{timestamp}.docx"
-    output_path = os.path.join("files", file_name)
+    state["output_id"] = uuid.uuid4().hex
+    state["file_name"] = f"BRD_{safe_proj_name}_{timestamp}.docx"
 
-    doc.save(output_path)
+    data = await asyncio.to_thread(
+        _docx_bytes, state.get("docx_document"), state["brd_html"], state.get("template_key"),
+        state.get("brd_template_file"),
+    )
+    state["docx_content"] = data
+    record(docx_bytes=len(data), output_id=state["output_id"])
 
-    state["output_path"] = os.path.abspath(output_path)
-    state["file_name"] = file_name
-    state["final_docx"] = state["output_path"]
-    print(f"Word document : {state['final_docx']}")
+    if output_store is not None:
+        _, state["output_path"] = await asyncio.to_thread(output_store.put, data, state["output_id"])
+        state["final_docx"] = state["output_path"]
+        print(f"Word document : {state['final_docx']}")
+    else:
+        print(f"Word document : {state['file_name']} ({len(data)} bytes, in memory)")
     return state
 
-def invalid_output_node(state: BRDState) -> BRDState:
+@traced
+async def plan_sections_node(state: BRDState) -> dict:
+    """Reuse the previous run's sections and pick the ones that need regenerating"""
+    previous = state["previous"]
+    fingerprints = {
+        h: section_fingerprint(state["user_input"], state["headings"], h) for h in state["headings"]
+    }
+    targets = plan_regeneration(previous, state["user_input"], state["headings"], fingerprints,
+                                state.get("requested_sections"))
+    reused = {h: html for h, html in (previous.get("sections") or {}).items()
+              if h in state["headings"] and h not in targets}
+    record(regenerated=len(targets), reused=len(reused))
+    writer = get_stream_writer()
+    for heading, html in reused.items():
+        writer({"section": html, "heading": heading})
+    print(f"Regenerating sections: {targets}")
+    return {"regenerate_sections": targets, "section_html": reused}
+
+@traced
+async def invalid_output_node(state: BRDState) -> BRDState:
     print("Please provide a valid project description.")
     return state
 
@@ -107,18 +376,56 @@ builder = StateGraph(BRDState)
 builder.add_node("extract_headings_node", extract_headings_node)
 builder.add_node("validate_input_node", validate_input_node)
 builder.add_node("generate_brd_html_node", generate_brd_html_node)
+builder.add_node("generate_section_node", generate_section_node,
+                 retry_policy=RetryPolicy(max_attempts=SECTION_ATTEMPTS, retry_on=retry_section))
+builder.add_node("merge_sections_node", merge_sections_node)
+builder.add_node("plan_sections_node", plan_sections_node)
 builder.add_node("html_to_word_node", html_to_word_node)
 builder.add_node("invalid_output_node", invalid_output_node)
 
 builder.add_edge(START, "extract_headings_node")
 builder.add_edge("extract_headings_node", "validate_input_node")
 
+def _section_sends(state: BRDState, headings: list) -> list:
+    return [
+        Send("generate_section_node", {
+            "heading": heading,
+            "user_input": state["user_input"],
+            "headings": state["headings"],
+            "refresh_cache": state.get("refresh_cache", False),
+            "trace_id": state.get("trace_id"),
+        })
+        for heading in headings
+    ]
+
 def route_after_validation(state: BRDState):
-    return "generate_brd_html_node" if state["is_valid"] else "invalid_output_node"
+    if not state["is_valid"]:
+        return "invalid_output_node"
+    if (state.get("previous") or {}).get("sections") and state["headings"]:
+        return "plan_sections_node"
+    if state.get("stream", STREAM):
+        return "generate_brd_html_node"
+    if state.get("parallel_sections", PARALLEL_SECTIONS) and state["headings"]:
+        return _section_sends(state, state["headings"])
+    return "generate_brd_html_node"
+
+def route_after_plan(state: BRDState):
+    return _section_sends(state, state["regenerate_sections"]) or "merge_sections_node"
 
-builder.add_conditional_edges("validate_input_node", route_after_validation)
+builder.add_conditional_edges(
+    "validate_input_node",
+    route_after_validation,
+    ["generate_brd_html_node", "generate_section_node", "plan_sections_node", "invalid_output_node"],
+)
+builder.add_conditional_edges(
+    "plan_sections_node",
+    route_after_plan,
+    ["generate_section_node", "merge_sections_node"],
+)
 builder.add_edge("generate_brd_html_node", "html_to_word_node")
+builder.add_edge("generate_section_node", "merge_sections_node")
+builder.add_edge("merge_sections_node", "html_to_word_node")
 builder.add_edge("html_to_word_node", END)
 builder.add_edge("invalid_output_node", END)
 
-graph = builder.compile()
+graph = builder.compile().with_config(max_concurrency=SECTION_CONCURRENCY)
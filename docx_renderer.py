@@ -0,0 +1,230 @@
+"""Single-pass HTML to DOCX renderer for the BRD tag subset.
+
+The generation prompt restricts the model to <h1>-<h3>, <p>, <ul>/<ol>/<li>
+and <table>/<tr>/<th>/<td>, plus simple inline emphasis. This renderer maps
+those tags straight onto python-docx while the HTML is parsed, writes tables
+as WordprocessingML in one go and applies the table style as it builds them.
+It can be fed incrementally, and tolerates unclosed or stray tags.
+"""
+import re
+from html.parser import HTMLParser
+from xml.sax.saxutils import escape
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+HEADINGS = {"h1": "Heading 1", "h2": "Heading 2", "h3": "Heading 3"}
+INLINE = {"b": "bold", "strong": "bold", "i": "italic", "em": "italic", "u": "underline"}
+_FENCE = re.compile(r"^[ \t]*```[a-z]*[ \t]*$", re.IGNORECASE | re.MULTILINE)
+_SPACE = re.compile(r"\s+")
+# usable width of a Letter page with 1" margins, in twentieths of a point
+_DEFAULT_TABLE_WIDTH = 9360
+
+
+class DocxRenderer(HTMLParser):
+    """Render BRD HTML into a python-docx Document; call feed() any number of times, then close()"""
+
+    def __init__(self, doc, table_style: str = "Table Grid"):
+        super().__init__(convert_charrefs=True)
+        self.doc = doc
+        names = {s.name: s for s in doc.styles}
+        self._styles = names
+        self._table_style_id = names[table_style].style_id if table_style in names else None
+        self._table_width = _table_width(doc)
+        self._paragraph = None
+        self._format = {"bold": 0, "italic": 0, "underline": 0}
+        self._lists = []
+        self._table = None
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in INLINE:
+            self._format[INLINE[tag]] += 1
+        elif tag == "br":
+            if self._cell is not None:
+                self._cell.append(("\n", False, False, False))
+            elif self._paragraph is not None:
+                self._paragraph.add_run().add_break()
+        elif self._table is not None:
+            self._table_start(tag)
+        elif tag in HEADINGS:
+            self._start_paragraph(HEADINGS[tag])
+        elif tag == "p":
+            # <li><p>text</p></li> keeps the text in the list paragraph
+            if not (self._lists and self._paragraph is not None and not self._paragraph.runs):
+                self._start_paragraph(None)
+        elif tag in ("ul", "ol"):
+            self._paragraph = None
+            self._lists.append(tag)
+        elif tag == "li":
+            self._start_paragraph(self._list_style())
+        elif tag == "table":
+            self._paragraph = None
+            self._table = []
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == "br":
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in INLINE:
+            key = INLINE[tag]
+            self._format[key] = max(0, self._format[key] - 1)
+        elif self._table is not None:
+            self._table_end(tag)
+        elif tag in HEADINGS or tag in ("p", "li"):
+            self._paragraph = None
+        elif tag in ("ul", "ol"):
+            self._paragraph = None
+            if self._lists:
+                self._lists.pop()
+
+    def handle_data(self, data):
+        if "```" in data:
+            data = _FENCE.sub("", data)
+        if self._cell is not None:
+            self._cell.append((data, self._format["bold"] > 0, self._format["italic"] > 0,
+                               self._format["underline"] > 0))
+            return
+        if self._table is not None:
+            return
+        text = _SPACE.sub(" ", data)
+        if self._paragraph is None:
+            text = text.lstrip()
+            if not text:
+                return
+            self._start_paragraph(None)
+        elif not self._paragraph.runs:
+            text = text.lstrip()
+        if text:
+            run = self._paragraph.add_run(text)
+            if self._format["bold"]:
+                run.bold = True
+            if self._format["italic"]:
+                run.italic = True
+            if self._format["underline"]:
+                run.underline = True
+
+    def close(self):
+        super().close()
+        if self._table is not None:
+            self._finish_row()
+            self._flush_table()
+        self._paragraph = None
+
+    def _start_paragraph(self, style):
+        style = self._styles.get(style) if style else None
+        self._paragraph = self.doc.add_paragraph(style=style)
+
+    def _list_style(self):
+        base = "List Number" if self._lists and self._lists[-1] == "ol" else "List Bullet"
+        depth = min(len(self._lists), 3)
+        name = f"{base} {depth}" if depth > 1 else base
+        return name if name in self._styles else base
+
+    def _table_start(self, tag):
+        if tag == "tr":
+            self._finish_row()
+            self._row = [False, []]
+        elif tag in ("td", "th"):
+            self._finish_cell()
+            if self._row is None:
+                self._row = [False, []]
+            self._row[0] = self._row[0] or tag == "th"
+            self._cell = []
+        elif tag in ("p", "li") and self._cell:
+            self._cell.append(("\n", False, False, False))
+
+    def _table_end(self, tag):
+        if tag in ("td", "th"):
+            self._finish_cell()
+        elif tag == "tr":
+            self._finish_row()
+        elif tag == "table":
+            self._finish_row()
+            self._flush_table()
+
+    def _finish_cell(self):
+        if self._cell is not None and self._row is not None:
+            self._row[1].append(self._cell)
+        self._cell = None
+
+    def _finish_row(self):
+        self._finish_cell()
+        if self._row is not None and self._row[1]:
+            self._table.append(self._row)
+        self._row = None
+
+    def _flush_table(self):
+        rows, self._table = self._table, None
+        if rows:
+            self.doc.element.body._insert_tbl(parse_xml(self._table_xml(rows)))
+
+    def _table_xml(self, rows) -> str:
+        cols = max(len(cells) for _, cells in rows)
+        width = self._table_width // cols
+        style = f'<w:tblStyle w:val="{self._table_style_id}"/>' if self._table_style_id else ""
+        parts = [
+            f'<w:tbl {nsdecls("w")}><w:tblPr>{style}<w:tblW w:type="auto" w:w="0"/>'
+            '<w:tblLook w:val="04A0" w:firstRow="1" w:lastRow="0" w:firstColumn="1" '
+            'w:lastColumn="0" w:noHBand="0" w:noVBand="1"/></w:tblPr><w:tblGrid>',
+            f'<w:gridCol w:w="{width}"/>' * cols,
+            "</w:tblGrid>",
+        ]
+        cell_open = f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr><w:p>'
+        empty_cell = cell_open + "</w:p></w:tc>"
+        for is_header, cells in rows:
+            parts.append("<w:tr><w:trPr><w:tblHeader/></w:trPr>" if is_header else "<w:tr>")
+            for segments in cells:
+                parts.append(cell_open)
+                parts.append(_runs_xml(segments, is_header))
+                parts.append("</w:p></w:tc>")
+            parts.append(empty_cell * (cols - len(cells)))
+            parts.append("</w:tr>")
+        parts.append("</w:tbl>")
+        return "".join(parts)
+
+
+def _runs_xml(segments, header: bool) -> str:
+    parts = []
+    line_start = True
+    for data, bold, italic, underline in segments:
+        if data == "\n":
+            if not line_start:
+                parts.append("<w:r><w:br/></w:r>")
+                line_start = True
+            continue
+        data = _SPACE.sub(" ", data)
+        if line_start:
+            data = data.lstrip()
+        if not data:
+            continue
+        line_start = False
+        props = ""
+        if bold or header:
+            props += "<w:b/>"
+        if italic:
+            props += "<w:i/>"
+        if underline:
+            props += '<w:u w:val="single"/>'
+        if props:
+            props = f"<w:rPr>{props}</w:rPr>"
+        parts.append(f'<w:r>{props}<w:t xml:space="preserve">{escape(data)}</w:t></w:r>')
+    return "".join(parts)
+
+
+def _table_width(doc) -> int:
+    section = doc.sections[-1] if len(doc.sections) else None
+    if section is None or not section.page_width:
+        return _DEFAULT_TABLE_WIDTH
+    width = section.page_width - (section.left_margin or 0) - (section.right_margin or 0)
+    return max(int(width / 635), 1440)
+
+
+def render_html(html: str, doc, table_style: str = "Table Grid"):
+    """Render a complete BRD HTML string into doc"""
+    renderer = DocxRenderer(doc, table_style)
+    renderer.feed(html)
+    renderer.close()
+    return doc
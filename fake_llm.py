@@ -0,0 +1,129 @@
+"""Local stand-in for the Gemini generateContent API.
+
+Point the agent at it with GEMINI_BASE_URL=http://127.0.0.1:<port> and any
+GOOGLE_API_KEY. Responses are deterministic for a given prompt. Both
+generateContent and streamGenerateContent (server-sent events) are served.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_brd_html(prompt: str, rows: int = 5) -> str:
+    """Build a deterministic BRD in the restricted HTML tag set from the prompt"""
+    section = re.search(r'Write ONLY the section "(.+?)"', prompt)
+    if section:
+        headings = [section.group(1)]
+    else:
+        listed = re.search(r"Use the following main headings: (.*)\.", prompt)
+        headings = listed.group(1).split(", ") if listed else ["Overview"]
+
+    parts = []
+    for i, heading in enumerate(headings, 1):
+        parts.append(f"<h1>{heading}</h1>")
+        parts.append(f"<h2>{i}.1 Summary</h2>")
+        parts.append(f"<p>This section describes the {heading.lower()} of the project.</p>")
+        parts.append("<ul><li>First point</li><li>Second point</li></ul>")
+        parts.append(f"<h2>{i}.2 Details</h2>")
+        parts.append("<table><tr><th>ID</th><th>Requirement</th><th>Priority</th></tr>")
+        for r in range(1, rows + 1):
+            parts.append(f"<tr><td>{heading[:2].upper()}-{r}</td><td>Requirement {r}</td><td>High</td></tr>")
+        parts.append("</table>")
+    return "\n".join(parts)
+
+
+def _prompt_text(body: dict) -> str:
+    return "".join(
+        part.get("text", "")
+        for content in body.get("contents", [])
+        for part in content.get("parts", [])
+    )
+
+
+def _payload(text: str, prompt: str) -> dict:
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "finishReason": "STOP",
+        }],
+        "usageMetadata": {
+            "promptTokenCount": len(prompt.split()),
+            "candidatesTokenCount": len(text.split()),
+            "totalTokenCount": len(prompt.split()) + len(text.split()),
+        },
+    }
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    latency = 0.5
+    rows = 5
+    chunk_size = 200
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = _prompt_text(body)
+
+        if ":streamGenerateContent" in self.path:
+            self._stream(prompt)
+            return
+        if ":generateContent" not in self.path:
+            self.send_error(404)
+            return
+        time.sleep(self.latency)
+        data = json.dumps(_payload(fake_brd_html(prompt, self.rows), prompt)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, prompt: str):
+        text = fake_brd_html(prompt, self.rows)
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        # spread the latency so the first chunk arrives early, like a real model
+        delay = self.latency / (len(chunks) + 1)
+        for i, chunk in enumerate(chunks):
+            time.sleep(delay)
+            payload = _payload(chunk, prompt)
+            if i == len(chunks) - 1:
+                payload["usageMetadata"] = _payload(text, prompt)["usageMetadata"]
+            else:
+                del payload["usageMetadata"]
+            self.wfile.write(b"data: " + json.dumps(payload).encode() + b"\r\n\r\n")
+            self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def start_fake_llm(port: int = 0, latency: float = 0.5, rows: int = 5) -> FakeLLMServer:
+    """Start the fake server on a background thread and return it"""
+    handler = type("Handler", (FakeLLMHandler,), {"latency": latency, "rows": rows})
+    server = FakeLLMServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake Gemini API server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--rows", type=int, default=5)
+    args = parser.parse_args()
+    server = start_fake_llm(args.port, args.latency, args.rows)
+    print(f"Fake LLM listening on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
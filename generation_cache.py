@@ -0,0 +1,139 @@
+"""SQLite-backed cache of model generations with in-flight request coalescing.
+
+Entries are keyed on the normalized inputs of a generation (description,
+headings, section, model and prompt version). Concurrent identical requests
+share one upstream call instead of each making their own. If the caller that
+owns that call is cancelled, a waiting caller takes it over.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+def normalize_description(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+
+class GenerationCache:
+    """Disk-backed generation cache with TTL and size-based eviction"""
+
+    def __init__(self, path: str = ":memory:", ttl: float = 7 * 24 * 3600, max_bytes: int = 256 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS generations ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def key(description: str, headings: list, model: str, prompt_version: str, section: str = "") -> str:
+        payload = json.dumps(
+            [normalize_description(description), list(headings), model, prompt_version, section],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created_at FROM generations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM generations WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE generations SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return row[0]
+
+    def set(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO generations VALUES (?, ?, ?, ?, ?)",
+                (key, response, len(response.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float):
+        self._db.execute("DELETE FROM generations WHERE created_at < ?", (now - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM generations").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute(
+            "SELECT key, size FROM generations ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM generations WHERE key = ?", (key,))
+            total -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM generations"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                "entries": entries, "bytes": size}
+
+    async def get_or_generate(self, key: str, generate, refresh: bool = False) -> str:
+        """Return the cached response for key, or await generate() once for all concurrent callers"""
+        response, _ = await self.lookup(key, generate, refresh)
+        return response
+
+    async def lookup(self, key: str, generate, refresh: bool = False):
+        """Like get_or_generate, but also return how the response was served: hit, coalesced or miss"""
+        if not refresh:
+            cached = await asyncio.to_thread(self.get, key)
+            if cached is not None:
+                self.hits += 1
+                return cached, "hit"
+
+        while key in self._pending:
+            pending = self._pending[key]
+            try:
+                response = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # only the owner of the call was cancelled: take over and make the call ourselves
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                continue
+            self.coalesced += 1
+            return response, "coalesced"
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._pending[key] = future
+        try:
+            response = await generate()
+            await asyncio.to_thread(self.set, key, response)
+            future.set_result(response)
+            return response, "miss"
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._pending.pop(key, None)
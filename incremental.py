@@ -0,0 +1,178 @@
+"""Work out which BRD sections need regenerating after the user edits their description.
+
+A chat session keeps the HTML of every section it generated, together with a
+fingerprint of the inputs used for each one. On the next message the planner
+picks the sections to regenerate. An explicit command such as
+"regenerate Non-Functional Requirements only" (or "/regenerate ...") picks the named sections. For
+an edited description, it picks the sections whose heading or previous
+content mentions the words that changed, unless so much changed that it is a
+new project and every section is regenerated. Words that no section mentions yet,
+as in an added sentence, go to the section(s) whose heading topic or content
+best matches the sentence they appear in. Every other section is reused as is.
+"""
+import difflib
+import math
+import re
+
+from generation_cache import normalize_description
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9\-]+")
+_TAGS = re.compile(r"<[^>]+>")
+_SENTENCE = re.compile(r"[^.!?;\n]+")
+_COMMAND = re.compile(r"^\s*(?:/regenerate\b|(?:please\s+)?(?:re-?generate|redo|rewrite)\b)", re.IGNORECASE)
+_EXPLICIT_COMMAND = re.compile(r"^\s*/regenerate\b", re.IGNORECASE)
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "will", "should", "shall", "must",
+    "are", "was", "were", "been", "have", "has", "can", "also", "all", "any", "our", "their", "its",
+    "only", "section", "sections", "please", "regenerate", "more", "less", "than", "not", "but",
+}
+# a changed word found in more than this share of sections says nothing about which one changed
+GENERIC_SHARE = 0.6
+# new words matching more sections than this equally well are not placed anywhere
+MAX_PLACED = 2
+# descriptions less similar than this are a different project, so nothing is reused
+REWRITE_RATIO = 0.5
+# words that usually belong to a section whose heading contains one of the fragments
+TOPICS = [
+    (("non-functional", "performance", "quality"),
+     "performance concurrent latency uptime availability scalability scale load response throughput "
+     "reliability backup recovery accessibility usability peak"),
+    (("security", "compliance", "privacy"),
+     "security encryption encrypted authentication login password gdpr hipaa compliance privacy audit "
+     "permission role sso"),
+    (("integration", "interface"), "api integrate integration sync import export webhook erp crm third-party"),
+    (("report", "analytics"), "report dashboard analytics metric kpi chart"),
+    (("risk",), "risk mitigation dependency"),
+    (("constraint", "assumption"), "budget deadline constraint timeline cost assumption"),
+    (("scope",), "scope phase mvp release"),
+    (("stakeholder",), "stakeholder sponsor owner department"),
+    (("data",), "data database storage retention migration backup"),
+    (("acceptance", "test"), "acceptance test testing criteria uat sign-off"),
+]
+
+
+def _words(text: str) -> list:
+    return [w for w in _WORD.findall(text.lower()) if len(w) > 2 and w not in STOPWORDS]
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def is_regenerate_command(message: str) -> bool:
+    """True for an explicit "/regenerate ..." command, whether or not it names a section"""
+    return bool(_EXPLICIT_COMMAND.match(message or ""))
+
+
+def parse_regenerate_command(message: str, headings: list) -> list:
+    """Return the headings named in a "regenerate X only" style message, or [] if it names none.
+
+    A message like "Rewrite our inventory system ..." that names no heading is a
+    project description, not a command.
+    """
+    if not _COMMAND.match(message or ""):
+        return []
+    text = " ".join(message.lower().split())
+    named = [h for h in headings if h.lower() in text]
+    # prefer the longest names so "Requirements" does not also pick "Non-Functional Requirements"
+    return [h for h in named if not any(h != other and h.lower() in other.lower() for other in named)]
+
+
+def description_similarity(old: str, new: str) -> float:
+    """Share of content words two descriptions have in common, in order (0 to 1)"""
+    return difflib.SequenceMatcher(a=_words(old), b=_words(new), autojunk=False).ratio()
+
+
+def changed_words(old: str, new: str) -> set:
+    """Content words added or removed between two versions of a description"""
+    old_words, new_words = _words(old), _words(new)
+    changed = set()
+    matcher = difflib.SequenceMatcher(a=old_words, b=new_words, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            changed.update(old_words[i1:i2])
+            changed.update(new_words[j1:j2])
+    return {_stem(w) for w in changed}
+
+
+def _topic_score(heading: str, words: set) -> int:
+    title = heading.lower()
+    return sum(
+        len(words & {_stem(w) for w in hints.split()})
+        for fragments, hints in TOPICS if any(f in title for f in fragments)
+    )
+
+
+def _context_words(texts: list, words: set) -> set:
+    """Words of every sentence in texts that contains one of words"""
+    context = set()
+    for text in texts:
+        for sentence in _SENTENCE.findall(text.lower()):
+            sentence_words = {_stem(w) for w in _words(sentence)}
+            if sentence_words & words:
+                context |= sentence_words
+    return context
+
+
+def best_sections(words: set, vocab: dict) -> list:
+    """Headings that best match words by heading topic and rarity-weighted content overlap"""
+    count = len(vocab)
+    scores = {}
+    for heading, heading_words in vocab.items():
+        overlap = sum(
+            math.log((count + 1) / (sum(w in other for other in vocab.values()) + 1))
+            for w in words & heading_words
+        )
+        scores[heading] = 3 * _topic_score(heading, words) + overlap
+    top = max(scores.values(), default=0)
+    best = [heading for heading, score in scores.items() if score == top]
+    return best if top > 0 and len(best) <= MAX_PLACED else []
+
+
+def affected_sections(old_description: str, new_description: str, sections: dict) -> list:
+    """Headings whose title or previous content mentions a word that changed in the description,
+    plus the best match for changed words that no section mentions yet"""
+    changed = changed_words(old_description, new_description)
+    if not changed or not sections:
+        return []
+    vocab = {
+        heading: {_stem(w) for w in _words(heading + " " + _TAGS.sub(" ", html))}
+        for heading, html in sections.items()
+    }
+    limit = max(1, int(len(sections) * GENERIC_SHARE))
+    specific = {w for w in changed if sum(w in words for words in vocab.values()) <= limit}
+    affected = {heading for heading, words in vocab.items() if words & specific}
+
+    unplaced = changed - set().union(*vocab.values())
+    if unplaced:
+        affected.update(best_sections(_context_words([old_description, new_description], unplaced), vocab))
+    return [heading for heading in sections if heading in affected]
+
+
+def plan_regeneration(previous: dict, description: str, headings: list, fingerprints: dict,
+                      requested: list = None) -> list:
+    """Return the headings to regenerate given the previous session output.
+
+    previous holds "description", "headings", "sections" and "fingerprints" from
+    the last run; fingerprints maps each current heading to its input fingerprint.
+    """
+    sections = previous.get("sections") or {}
+    if not sections or previous.get("headings") != headings:
+        return list(headings)
+    if requested:
+        return [h for h in headings if h in requested]
+
+    stale = [h for h in headings
+             if h not in sections or previous.get("fingerprints", {}).get(h) != fingerprints[h]]
+    if normalize_description(previous.get("description")) == normalize_description(description):
+        return stale
+
+    if description_similarity(previous.get("description", ""), description) < REWRITE_RATIO:
+        return list(headings)
+    affected = set(affected_sections(previous.get("description", ""), description, sections))
+    targets = [h for h in headings if h in affected or h not in sections]
+    # an edit that no section can be tied to could touch any of them
+    return targets or list(headings)
@@ -0,0 +1,105 @@
+"""Load test the BRD graph against the local fake LLM server.
+
+    python load_test.py --sessions 60 --latency 0.5
+
+Each session goes through the same AdmissionController the Chainlit app uses
+and runs graph.ainvoke end to end, including the DOCX build.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from docx import Document
+
+from admission import AdmissionController, AdmissionRejected
+from fake_llm import start_fake_llm
+
+HEADINGS = ["Introduction", "Business Objectives", "Scope", "Functional Requirements",
+            "Non-Functional Requirements", "Assumptions", "Acceptance Criteria"]
+
+
+def make_template(path: str):
+    doc = Document()
+    for heading in HEADINGS:
+        doc.add_heading(heading, level=1)
+        doc.add_paragraph("Describe the section here.")
+    doc.save(path)
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_session(graph, admission, template, session_id, latencies, outcomes, stream=False,
+                      first_content=None):
+    start = time.perf_counter()
+    try:
+        async with admission.slot():
+            result = await graph.ainvoke({
+                "project_name": f"Load {session_id}",
+                "user_input": f"Online ordering portal for store number {session_id} with payments and delivery",
+                "brd_template_file": template,
+                "stream": stream,
+            })
+    except AdmissionRejected:
+        outcomes["rejected"] += 1
+        return
+    except Exception as e:
+        outcomes["failed"] += 1
+        print(f"session {session_id} failed: {e!r}")
+        return
+    latencies.append(time.perf_counter() - start)
+    if result.get("first_content_seconds") is not None:
+        first_content.append(result["first_content_seconds"])
+    outcomes["ok" if result.get("docx_content") else "failed"] += 1
+
+
+async def main(args):
+    workdir = tempfile.mkdtemp(prefix="brd_load_")
+    os.chdir(workdir)
+    template = os.path.join(workdir, "template.docx")
+    make_template(template)
+
+    server = start_fake_llm(latency=args.latency, rows=args.rows)
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("GOOGLE_API_KEY", "fake-key")
+
+    from brd_generate_agent import graph
+
+    admission = AdmissionController(args.max_in_flight, args.max_queue)
+    latencies, first_content, outcomes = [], [], {"ok": 0, "failed": 0, "rejected": 0}
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_session(graph, admission, template, i, latencies, outcomes, args.stream, first_content)
+        for i in range(args.sessions)
+    ))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    print(f"sessions:    {args.sessions} (max_in_flight={args.max_in_flight}, max_queue={args.max_queue})")
+    print(f"outcomes:    {outcomes}")
+    print(f"wall time:   {elapsed:.2f}s")
+    print(f"throughput:  {outcomes['ok'] / elapsed:.2f} BRDs/s")
+    print(f"latency p50: {percentile(latencies, 50):.2f}s")
+    print(f"latency p95: {percentile(latencies, 95):.2f}s")
+    if first_content:
+        print(f"first content p50: {percentile(first_content, 50):.2f}s")
+        print(f"first content p95: {percentile(first_content, 95):.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the BRD graph with a fake LLM")
+    parser.add_argument("--sessions", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake LLM latency per call, seconds")
+    parser.add_argument("--rows", type=int, default=5, help="table rows per fake section")
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--stream", action="store_true", help="use the streaming generation mode")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,153 @@
+"""Content-addressed store for generated BRD documents with size and age retention.
+
+Documents are stored as <root>/<aa>/<digest>.docx, where digest is a SHA-256
+of the zip members. Identical outputs are therefore stored once even though
+every save stamps new zip timestamps. Each request's output_id is recorded in
+<root>/ids/<output_id>.ref, which names the digest it produced. Old files are
+removed by gc(), which start_gc() runs periodically on a background thread.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+import zipfile
+
+# a .tmp file this old was left behind by an interrupted put()
+STALE_TMP_SECONDS = 3600
+
+
+def content_digest(data: bytes) -> str:
+    """Hash a .docx by its member names and contents, ignoring zip timestamps"""
+    digest = hashlib.sha256()
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for name in sorted(archive.namelist()):
+                digest.update(name.encode("utf-8") + b"\0")
+                digest.update(archive.read(name))
+    except zipfile.BadZipFile:
+        return hashlib.sha256(data).hexdigest()
+    return digest.hexdigest()
+
+
+class OutputStore:
+    def __init__(self, root: str, max_bytes: int = 1024 ** 3, max_age: float = 7 * 24 * 3600):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._gc_thread = None
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.docx")
+
+    def _ref_path(self, output_id: str) -> str:
+        return os.path.join(self.root, "ids", f"{output_id}.ref")
+
+    def put(self, data: bytes, output_id: str = None):
+        """Store data unless an identical document exists; return (digest, absolute path).
+
+        With output_id, the document can later be found again with resolve(output_id).
+        """
+        digest = content_digest(data)
+        path = self.path_for(digest)
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)  # refresh its age for retention
+            else:
+                _atomic_write(path, data)
+            if output_id:
+                _atomic_write(self._ref_path(output_id), digest.encode("ascii"))
+        return digest, os.path.abspath(path)
+
+    def resolve(self, output_id: str):
+        """Return the absolute path of the document stored for output_id, or None"""
+        try:
+            with open(self._ref_path(output_id), encoding="ascii") as f:
+                path = self.path_for(f.read().strip())
+        except OSError:
+            return None
+        return os.path.abspath(path) if os.path.exists(path) else None
+
+    def gc(self) -> int:
+        """Delete expired documents, then the oldest ones until the store fits max_bytes.
+
+        Also removes output_id references to deleted documents and .tmp files
+        left behind by interrupted writes.
+        """
+        now = time.time()
+        entries = []
+        leftovers = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if filename.endswith(".docx"):
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                elif filename.endswith(".tmp") and now - stat.st_mtime > STALE_TMP_SECONDS:
+                    leftovers.append(path)
+
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        with self._lock:
+            for mtime, size, path in sorted(entries):
+                if now - mtime <= self.max_age and total <= self.max_bytes:
+                    break
+                try:
+                    # put() may have refreshed the document since the walk
+                    stat = os.stat(path)
+                    if stat.st_mtime != mtime and now - stat.st_mtime <= self.max_age:
+                        continue
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            for path in leftovers:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self._gc_refs()
+        return removed
+
+    def _gc_refs(self):
+        ids_dir = os.path.join(self.root, "ids")
+        if not os.path.isdir(ids_dir):
+            return
+        for filename in os.listdir(ids_dir):
+            if filename.endswith(".ref") and self.resolve(filename[:-len(".ref")]) is None:
+                try:
+                    os.remove(os.path.join(ids_dir, filename))
+                except OSError:
+                    pass
+
+    def start_gc(self, interval: float = 600):
+        """Run gc() every interval seconds on a daemon thread"""
+        if self._gc_thread is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    removed = self.gc()
+                    if removed:
+                        print(f"Output store GC removed {removed} documents")
+                except Exception as e:
+                    print(f"Output store GC failed: {e!r}")
+                time.sleep(interval)
+
+        self._gc_thread = threading.Thread(target=loop, name="brd-output-gc", daemon=True)
+        self._gc_thread.start()
+
+
+def _atomic_write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429
+
+
+class RateLimiter:
+    """Space model calls to a requests-per-minute budget and back off on HTTP 429"""
+
+    def __init__(self, requests_per_minute: float, max_retries: int = 5, backoff: float = 10.0):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.throttled = 0
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+
+    async def acquire(self):
+        """Wait for the next free request slot"""
+        now = time.monotonic()
+        slot = max(now, self._next_slot, self._paused_until)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def pause(self, seconds: float):
+        """Hold back every caller, e.g. after the API reported a rate limit"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def run(self, call):
+        """Await call() within the budget, retrying with exponential backoff when rate limited"""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire()
+            try:
+                return await call()
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.max_retries:
+                    raise
+                self.throttled += 1
+                self.pause(self.backoff * 2 ** attempt)
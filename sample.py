@@ -30,12 +30,10 @@ async def main(message: cl.Message):
         content="⏳ Generating your BRD Word document... please wait..."
     ).send()
 
-    # Run the graph in a separate thread (blocking operation)
-    import asyncio
+    # Run the async graph directly on the event loop
     import logging
 
-    result = await asyncio.to_thread(
-        graph.invoke,
+    result = await graph.ainvoke(
         {
             "project_name": "User Project",
             "user_input": user_description,
@@ -49,18 +47,20 @@ async def main(message: cl.Message):
         }
     )
 
-    logging.warning(f"GRAPH RESULT: {result}")  # Debugging in terminal
+    # Debugging in terminal (the document itself is left out)
+    logging.warning(f"GRAPH RESULT: { {k: v for k, v in result.items() if k not in ('docx_content', 'docx_document')} }")
 
-    docx_path = result.get("final_docx")
+    docx_content = result.get("docx_content")
 
-    if not docx_path:
+    if not docx_content:
         await cl.Message(content="❌ Failed to generate the BRD document.").send()
         return
 
     # Send the generated Word document to UI
     file = cl.File(
         name="BRD_Document.docx",
-        path=docx_path
+        content=docx_content,
+        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
     )
 
     await file.send(for_id=generating_msg.id)
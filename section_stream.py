@@ -0,0 +1,146 @@
+"""Helpers for consuming a streamed BRD as a sequence of sections."""
+import re
+from html.parser import HTMLParser
+
+_BOUNDARY = re.compile(r"<h[12][\s>]", re.IGNORECASE)
+_H1 = re.compile(r"<h1[^>]*>(.*?)</h1>", re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(r"<[^>]+>")
+_FENCE = re.compile(r"^\s*```(?:html)?\s*|\s*```\s*$", re.IGNORECASE)
+
+
+def strip_fences(html: str) -> str:
+    """Remove the ``` fences a model sometimes wraps its HTML in"""
+    return _FENCE.sub("", html)
+
+
+def split_sections(html: str, headings: list) -> dict:
+    """Map each heading to its <h1> section of a whole-document BRD.
+
+    A section whose <h1> matches no heading stays with the section before it;
+    anything before the first <h1> is dropped. Headings the document does not
+    contain are left out.
+    """
+    html = strip_fences(html)
+    starts = [m.start() for m in _H1.finditer(html)]
+    sections = {}
+    current = None
+    for start, end in zip(starts, starts[1:] + [len(html)]):
+        chunk = html[start:end]
+        title = _TAGS.sub("", _H1.match(chunk).group(1)).lower()
+        named = [h for h in headings if h.lower() in title]
+        if named:
+            current = max(named, key=len)
+            sections[current] = chunk.strip()
+        elif current is not None:
+            sections[current] += "\n" + chunk.strip()
+    return sections
+
+
+class SectionSplitter:
+    """Split streamed HTML into sections at <h1>/<h2> boundaries"""
+
+    def __init__(self):
+        self._buffer = ""
+        self.seen = False
+
+    def feed(self, text: str) -> list:
+        """Add streamed text and return the sections it completed"""
+        self.seen = True
+        self._buffer += text
+        sections = []
+        # a boundary at position 0 starts the current section, so search past it
+        match = _BOUNDARY.search(self._buffer, 1)
+        while match:
+            section = strip_fences(self._buffer[:match.start()])
+            if section.strip():
+                sections.append(section)
+            self._buffer = self._buffer[match.start():]
+            match = _BOUNDARY.search(self._buffer, 1)
+        return sections
+
+    def flush(self) -> list:
+        """Return whatever is left once the stream has ended"""
+        section, self._buffer = strip_fences(self._buffer), ""
+        return [section] if section.strip() else []
+
+
+class SectionOrderer:
+    """Hold back sections that finish out of order and release them in template order"""
+
+    def __init__(self, headings: list):
+        self._headings = list(headings)
+        self._next = 0
+        self._pending = {}
+
+    def add(self, heading: str, html: str) -> list:
+        """Record a finished section and return the sections that can now be shown"""
+        self._pending[heading] = html
+        ready = []
+        while self._next < len(self._headings) and self._headings[self._next] in self._pending:
+            ready.append(self._pending.pop(self._headings[self._next]))
+            self._next += 1
+        return ready
+
+    def flush(self) -> list:
+        """Return whatever is still held back once generation has ended"""
+        ready = [self._pending.pop(h) for h in self._headings if h in self._pending]
+        ready.extend(self._pending.values())
+        self._pending = {}
+        return ready
+
+
+class _MarkdownParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.blocks = []
+        self._text = ""
+        self._table = None
+        self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("h1", "h2", "h3", "p", "li", "table"):
+            self.flush()
+        if tag == "table":
+            self._table = []
+        elif tag == "tr":
+            self._row = []
+        elif tag in ("td", "th"):
+            self._text = ""
+
+    def handle_endtag(self, tag):
+        prefix = {"h1": "# ", "h2": "## ", "h3": "### ", "li": "- ", "p": ""}
+        if tag in prefix:
+            self.flush(prefix[tag])
+        elif tag in ("td", "th") and self._row is not None:
+            self._row.append(" ".join(self._text.split()).replace("|", "\\|"))
+            self._text = ""
+        elif tag == "tr" and self._row is not None and self._table is not None:
+            self._table.append("| " + " | ".join(self._row) + " |")
+            if len(self._table) == 1:
+                self._table.append("|" + " --- |" * len(self._row))
+            self._row = None
+        elif tag == "table" and self._table is not None:
+            if self._table:
+                self.blocks.append("\n".join(self._table))
+            self._table = None
+
+    def handle_data(self, data):
+        self._text += data
+
+    def flush(self, prefix=""):
+        text = " ".join(self._text.split())
+        if text and self._table is None:
+            if prefix == "- " and self.blocks and self.blocks[-1].startswith("- "):
+                self.blocks[-1] += "\n- " + text
+            else:
+                self.blocks.append(prefix + text)
+        self._text = ""
+
+
+def html_to_markdown(html: str) -> str:
+    """Render a BRD HTML fragment as Markdown for display in the chat"""
+    parser = _MarkdownParser()
+    parser.feed(html)
+    parser.close()
+    parser.flush()
+    return "\n\n".join(parser.blocks)
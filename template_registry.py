@@ -0,0 +1,201 @@
+"""Content-addressed cache of parsed BRD templates.
+
+Templates are keyed by the SHA-256 of the uploaded .docx bytes, so a repeat
+upload of the same corporate template skips the python-docx parse. Each entry
+keeps the cleaned Heading 1 list, the heading styles the template defines and
+an emptied copy of the template that can be cloned as the output base.
+"""
+import copy
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from docx import Document
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.parts.numbering import NumberingPart
+
+# Styles the HTML renderer relies on; copied in from the python-docx default
+# template when a corporate template does not define them.
+REQUIRED_STYLES = ["Heading 1", "Heading 2", "Heading 3", "List Bullet", "List Number", "Table Grid"]
+
+
+@dataclass
+class TemplateArtifact:
+    key: str
+    headings: list
+    heading_styles: list
+    base_docx: bytes = field(repr=False)
+
+    @property
+    def size(self) -> int:
+        return len(self.base_docx) + sum(len(h) for h in self.headings) + 256
+
+    def new_document(self):
+        """Return a fresh Document built on the template's page setup and styles"""
+        return Document(io.BytesIO(self.base_docx))
+
+
+def template_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def parse_template(data: bytes) -> TemplateArtifact:
+    """Parse template bytes into headings, heading styles and an empty base document"""
+    doc = Document(io.BytesIO(data))
+
+    headings = []
+    for para in doc.paragraphs:
+        if para.style.name == "Heading 1":
+            clean = re.sub(r"\s*\(.*?\)\s*", "", para.text.strip())
+            if clean:
+                headings.append(clean)
+
+    heading_styles = [s.name for s in doc.styles if s.name and s.name.startswith("Heading")]
+
+    body = doc.element.body
+    for child in list(body):
+        if not child.tag.endswith("}sectPr"):
+            body.remove(child)
+    _add_missing_styles(doc)
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return TemplateArtifact(template_key(data), headings, heading_styles, buffer.getvalue())
+
+
+def _add_missing_styles(doc):
+    names = {s.name for s in doc.styles}
+    missing = [name for name in REQUIRED_STYLES if name not in names]
+    if not missing:
+        return
+    default = Document()
+    for name in missing:
+        style = copy.deepcopy(default.styles[name].element)
+        _copy_numbering(style, default, doc)
+        doc.styles.element.append(style)
+
+
+def _numbering(doc):
+    """The document's numbering definitions, adding an empty numbering part if it has none"""
+    try:
+        return doc.part.part_related_by(RT.NUMBERING).element
+    except KeyError:
+        part = NumberingPart(PackURI("/word/numbering.xml"), CT.WML_NUMBERING,
+                             parse_xml(f"<w:numbering {nsdecls('w')}/>"), doc.part.package)
+        doc.part.relate_to(part, RT.NUMBERING)
+        return part.element
+
+
+def _copy_numbering(style, source, target):
+    """Copy the list definition a style copied from source uses into target, remapping its ids"""
+    num_ids = style.xpath("./w:pPr/w:numPr/w:numId")
+    if not num_ids:
+        return
+    source_numbering = source.part.numbering_part.element
+    num = source_numbering.num_having_numId(int(num_ids[0].get(qn("w:val"))))
+    abstract = source_numbering.xpath(f'./w:abstractNum[@w:abstractNumId="{num.abstractNumId.val}"]')[0]
+
+    numbering = _numbering(target)
+    existing = numbering.xpath("./w:abstractNum")
+    abstract = copy.deepcopy(abstract)
+    abstract_id = max((int(a.get(qn("w:abstractNumId"))) for a in existing), default=-1) + 1
+    abstract.set(qn("w:abstractNumId"), str(abstract_id))
+    # every w:abstractNum must come before the first w:num
+    if existing:
+        existing[-1].addnext(abstract)
+    else:
+        numbering.insert(0, abstract)
+    num_ids[0].set(qn("w:val"), str(numbering.add_num(abstract_id).numId))
+
+
+class TemplateRegistry:
+    """LRU of parsed templates bounded by total bytes, optionally persisted to disk"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, cache_dir: str = None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def load(self, path: str) -> TemplateArtifact:
+        """Return the parsed template at path, parsing it only on first sight"""
+        return self.lookup(path)[0]
+
+    def lookup(self, path: str):
+        """Like load, but also return whether the template was already cached"""
+        with open(path, "rb") as f:
+            data = f.read()
+        key = template_key(data)
+
+        artifact = self.get(key)
+        if artifact is not None:
+            self.hits += 1
+            return artifact, True
+
+        self.misses += 1
+        artifact = parse_template(data)
+        self._put(artifact)
+        self._persist(artifact)
+        return artifact, False
+
+    def preload(self, paths) -> list:
+        """Register templates ahead of time, e.g. at startup"""
+        return [self.load(path) for path in paths]
+
+    def get(self, key: str):
+        with self._lock:
+            artifact = self._entries.get(key)
+            if artifact is not None:
+                self._entries.move_to_end(key)
+                return artifact
+        artifact = self._restore(key)
+        if artifact is not None:
+            self._put(artifact)
+        return artifact
+
+    def _put(self, artifact: TemplateArtifact):
+        with self._lock:
+            old = self._entries.pop(artifact.key, None)
+            if old is not None:
+                self._size -= old.size
+            self._entries[artifact.key] = artifact
+            self._size += artifact.size
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def _persist(self, artifact: TemplateArtifact):
+        if not self.cache_dir:
+            return
+        base = os.path.join(self.cache_dir, artifact.key)
+        with open(base + ".docx", "wb") as f:
+            f.write(artifact.base_docx)
+        # the json is written last and marks the entry as complete
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump({"headings": artifact.headings, "heading_styles": artifact.heading_styles}, f)
+
+    def _restore(self, key: str):
+        if not self.cache_dir:
+            return None
+        base = os.path.join(self.cache_dir, key)
+        try:
+            with open(base + ".json", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(base + ".docx", "rb") as f:
+                base_docx = f.read()
+        except (OSError, ValueError):
+            return None
+        return TemplateArtifact(key, meta["headings"], meta["heading_styles"], base_docx)
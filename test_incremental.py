@@ -0,0 +1,90 @@
+from incremental import (
+    affected_sections, best_sections, is_regenerate_command, parse_regenerate_command, plan_regeneration,
+)
+from section_stream import split_sections
+
+DESCRIPTION = "Online ordering portal for a bakery with card payments, loyalty points and delivery tracking."
+SECTIONS = {
+    "Introduction": "<h1>Introduction</h1><p>Bakery ordering portal for customers and users.</p>",
+    "Functional Requirements": "<h1>Functional Requirements</h1><p>Users pay by card; delivery tracking map; "
+                               "loyalty points</p>",
+    "Non-Functional Requirements": "<h1>Non-Functional Requirements</h1><p>Pages load under 2s for users</p>",
+    "Security": "<h1>Security</h1><p>Users sign in with email</p>",
+    "Risks": "<h1>Risks</h1><p>Supplier delays could affect users</p>",
+    "Acceptance Criteria": "<h1>Acceptance Criteria</h1><p>Orders placed end to end by users</p>",
+}
+HEADINGS = list(SECTIONS)
+
+
+def previous(description=DESCRIPTION):
+    return {"description": description, "headings": HEADINGS, "sections": SECTIONS,
+            "fingerprints": {h: "old" for h in HEADINGS}}
+
+
+def plan(description, requested=None):
+    return plan_regeneration(previous(), description, HEADINGS, {h: "new" for h in HEADINGS}, requested)
+
+
+def test_new_project_regenerates_everything():
+    rewrite = "A hospital staff rostering tool with shift swaps and on-call alerts for nurses."
+    assert plan(rewrite) == HEADINGS
+
+
+def test_command_names_sections():
+    assert parse_regenerate_command("regenerate Non-Functional Requirements only", HEADINGS) == [
+        "Non-Functional Requirements"]
+    assert parse_regenerate_command("/regenerate risks and security", HEADINGS) == ["Security", "Risks"]
+
+
+def test_description_starting_with_command_word_is_not_a_command():
+    message = "Rewrite our legacy inventory system as a cloud web app with barcode scanning"
+    assert parse_regenerate_command(message, HEADINGS) == []
+    assert not is_regenerate_command(message)
+    assert not is_regenerate_command("Redo the company intranet with SSO and a staff directory")
+
+
+def test_explicit_command_without_known_section():
+    assert is_regenerate_command("/regenerate the glossary")
+    assert parse_regenerate_command("/regenerate the glossary", HEADINGS) == []
+
+
+def test_unchanged_description_regenerates_only_stale_sections():
+    fingerprints = {h: "old" for h in HEADINGS}
+    assert plan_regeneration(previous(), DESCRIPTION, HEADINGS, fingerprints) == []
+    fingerprints["Risks"] = "new"
+    assert plan_regeneration(previous(), DESCRIPTION, HEADINGS, fingerprints) == ["Risks"]
+
+
+def test_added_sentence_goes_to_matching_topic():
+    assert plan(DESCRIPTION + " It must handle 5000 concurrent users.") == ["Non-Functional Requirements"]
+
+
+def test_added_sentence_goes_to_topic_and_sections_mentioning_its_words():
+    assert plan(DESCRIPTION + " Customers should be able to sign in with Google SSO.") == [
+        "Introduction", "Security"]
+
+
+def test_changed_word_found_in_most_sections_is_ignored():
+    # "users" appears in every section, so it says nothing about which one changed
+    assert affected_sections(DESCRIPTION, DESCRIPTION + " for users", SECTIONS) == []
+
+
+def test_best_sections_prefers_heading_topic():
+    vocab = {h: set() for h in HEADINGS}
+    assert best_sections({"latency"}, vocab) == ["Non-Functional Requirements"]
+    assert best_sections({"nothing"}, vocab) == []
+
+
+def test_best_sections_gives_up_on_wide_ties():
+    vocab = {"A": {"invoice"}, "B": {"invoice"}, "C": {"invoice"}, "D": {"stock"}}
+    assert best_sections({"invoice"}, vocab) == []
+    assert best_sections({"stock"}, vocab) == ["D"]
+
+
+def test_whole_document_is_split_into_reusable_sections():
+    html = ("```html\n<h1>1. Introduction</h1><p>a</p><h2>1.1 Purpose</h2>"
+            "<h1>Security</h1><p>s</p><h1>Glossary</h1><p>g</p>\n```")
+    assert split_sections(html, HEADINGS) == {
+        "Introduction": "<h1>1. Introduction</h1><p>a</p><h2>1.1 Purpose</h2>",
+        "Security": "<h1>Security</h1><p>s</p>\n<h1>Glossary</h1><p>g</p>",
+    }
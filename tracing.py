@@ -0,0 +1,190 @@
+"""Per-node tracing and Prometheus-style metrics for the BRD graph.
+
+Wrap a node with @traced to time it. Inside a node, record(**attrs) adds
+attributes such as token counts or sizes to the current span. Finished spans
+go to every registered sink: set BRD_TRACE_FILE to append them as JSONL, or
+use add_sink() to collect them in process. metrics_text() renders the
+aggregated counters and latency histograms in the Prometheus text format,
+and start_metrics_server() serves them on /metrics.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6)
+
+_current_span = contextvars.ContextVar("brd_span", default=None)
+_sinks = []
+_lock = threading.Lock()
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        self.values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple, labels: tuple = ()):
+        self.name, self.help, self.buckets, self.label_names = name, help, buckets, labels
+        self.values = {}
+
+    def observe(self, value: float, *labels):
+        with _lock:
+            counts, total, count = self.values.get(labels, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.values[labels] = (counts, total + value, count + 1)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        le_names = self.label_names + ("le",)
+        for labels, (counts, total, count) in sorted(self.values.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_labels(le_names, labels + (f'{bound:g}',))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_labels(le_names, labels + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total:g}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+node_duration = Histogram("brd_node_duration_seconds", "Wall time per graph node", LATENCY_BUCKETS, ("node",))
+node_runs = Counter("brd_node_runs_total", "Graph node executions", ("node", "status"))
+llm_tokens = Counter("brd_llm_tokens_total", "Model tokens used", ("kind",))
+cache_lookups = Counter("brd_cache_lookups_total", "Template and generation cache lookups", ("cache", "result"))
+html_bytes = Histogram("brd_html_bytes", "Size of generated BRD HTML", SIZE_BUCKETS)
+docx_bytes = Histogram("brd_docx_bytes", "Size of rendered BRD documents", SIZE_BUCKETS)
+first_content = Histogram("brd_first_content_seconds", "Time to first streamed content", LATENCY_BUCKETS)
+METRICS = [node_duration, node_runs, llm_tokens, cache_lookups, html_bytes, docx_bytes, first_content]
+
+
+def add_sink(sink):
+    """Register a callable that receives every finished span as a dict"""
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    _sinks.remove(sink)
+
+
+def jsonl_sink(path: str):
+    """Return a sink that appends spans to a JSONL file"""
+    lock = threading.Lock()
+
+    def write(span: dict):
+        with lock, open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(span) + "\n")
+    return write
+
+
+def record(**attrs):
+    """Attach attributes to the current node span and update the matching metrics"""
+    span = _current_span.get()
+    if span is not None:
+        for key, value in attrs.items():
+            if key in ("prompt_tokens", "response_tokens"):
+                span[key] = span.get(key, 0) + value
+            else:
+                span[key] = value
+    for key, value in attrs.items():
+        if key == "prompt_tokens":
+            llm_tokens.inc("prompt", amount=value)
+        elif key == "response_tokens":
+            llm_tokens.inc("response", amount=value)
+        elif key == "html_bytes":
+            html_bytes.observe(value)
+        elif key == "docx_bytes":
+            docx_bytes.observe(value)
+        elif key == "first_content_seconds":
+            first_content.observe(value)
+        elif key.endswith("_cache"):
+            cache_lookups.inc(key[:-len("_cache")], value)
+
+
+def traced(node):
+    """Time an async graph node and emit one span per execution"""
+    name = node.__name__
+
+    @functools.wraps(node)
+    async def wrapper(state, *args, **kwargs):
+        if isinstance(state, dict) and not state.get("trace_id"):
+            state["trace_id"] = uuid.uuid4().hex
+        span = {"trace_id": state.get("trace_id") if isinstance(state, dict) else None,
+                "node": name, "started_at": time.time()}
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return await node(state, *args, **kwargs)
+        except BaseException as e:
+            status = "error"
+            span["error"] = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span["wall_seconds"] = time.perf_counter() - start
+            span["status"] = status
+            node_duration.observe(span["wall_seconds"], name)
+            node_runs.inc(name, status)
+            for sink in list(_sinks):
+                sink(span)
+    return wrapper
+
+
+def metrics_text() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = metrics_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve metrics_text() on http://host:port/metrics from a background thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if os.getenv("BRD_TRACE_FILE"):
+    add_sink(jsonl_sink(os.getenv("BRD_TRACE_FILE")))